@@ -0,0 +1,130 @@
+"""Password prompt for sudo, used when no graphical sudo helper is installed"""
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+class SudoPrompt:
+    def __init__(self, parent):
+        self.parent = parent
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Authentication Required")
+        self.dialog.geometry("300x150")
+        self.dialog.transient(parent)
+        
+        # Auth.TLabel is configured by _configure_styles() in linux-cru.py
+        ttk.Label(self.dialog, 
+                 text="Administrator privileges are required\nto modify display settings.",
+                 style="Auth.TLabel",
+                 justify="center").pack(pady=10)
+        
+        self.password = tk.StringVar()
+        self.entry = ttk.Entry(self.dialog, show="●", textvariable=self.password)
+        self.entry.pack(pady=10, padx=20, fill=tk.X)
+        
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10, padx=20)
+        
+        ttk.Button(btn_frame, text="OK", 
+                  command=self.ok).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", 
+                  command=self.cancel).pack(side=tk.RIGHT, padx=5)
+        
+        self.entry.bind('<Return>', lambda e: self.ok())
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+        # Destroyed with the main window while ask() is waiting. Tk can't be
+        # queried once the application is gone, so this is remembered here
+        self._destroyed = False
+        self.dialog.bind('<Destroy>', self._on_destroy)
+        
+        # Written by ok/cancel; ask() waits on it in a local event loop, so
+        # the application's mainloop keeps running
+        self._done = tk.IntVar(self.dialog)
+        
+        # Hidden between prompts and shown again by ask()
+        self.dialog.withdraw()
+    
+    def ask(self):
+        """Show the prompt and wait for it, returning the password or "" if cancelled"""
+        # Center the dialog on parent
+        if self.parent:
+            x = self.parent.winfo_x() + (self.parent.winfo_width() // 2) - (300 // 2)
+            y = self.parent.winfo_y() + (self.parent.winfo_height() // 2) - (150 // 2)
+            self.dialog.geometry(f"+{x}+{y}")
+        
+        self.password.set("")
+        self.dialog.deiconify()
+        self.dialog.wait_visibility()
+        self.dialog.grab_set()
+        self.entry.focus()
+        
+        self.dialog.wait_variable(self._done)
+        if self._destroyed:
+            return ""
+        
+        self.dialog.grab_release()
+        self.dialog.withdraw()
+        password = self.password.get()
+        self.password.set("")
+        return password
+    
+    def ok(self):
+        self._done.set(1)
+        
+    def cancel(self):
+        self.password.set("")
+        self._done.set(0)
+    
+    def _on_destroy(self, event):
+        # The binding also sees the dialog's children being destroyed
+        if event.widget is self.dialog:
+            self._destroyed = True
+            self.cancel()
+
+# Prompt kept around between authentications
+_prompt = None
+
+# Set by cancel_pending(); worker threads waiting for a password give up
+_closing = threading.Event()
+
+# Prompts requested by worker threads, as (result list, threading.Event);
+# shown on the Tk thread by show_pending() on <<AskPassword>>
+_requests = queue.SimpleQueue()
+
+def cancel_pending():
+    """Release worker threads still waiting for a password, e.g. when the window closes"""
+    _closing.set()
+
+def ask_password(parent):
+    """Ask for the user's password and return it, or "" if the prompt was cancelled"""
+    global _prompt
+    if threading.current_thread() is threading.main_thread():
+        if _prompt is None or _prompt._destroyed:
+            _prompt = SudoPrompt(parent)
+        return _prompt.ask()
+    
+    # Called from a worker thread: only queue the request and post the event,
+    # the dialog itself is shown by show_pending() on the Tk thread
+    result = []
+    done = threading.Event()
+    _requests.put((result, done))
+    try:
+        parent.event_generate("<<AskPassword>>", when="tail")
+    except (tk.TclError, RuntimeError):
+        return ""  # The window is gone
+    while not done.wait(0.1):
+        if _closing.is_set():
+            return ""
+    return result[0] if result else ""
+
+def show_pending(parent):
+    """Show the prompts requested by worker threads (<<AskPassword>> handler)"""
+    while True:
+        try:
+            result, done = _requests.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            result.append(ask_password(parent))
+        finally:
+            done.set()
@@ -11,9 +11,10 @@ fi
 # Create directory structure
 mkdir -p linux_cru.AppDir/{usr/{bin,share/{applications,icons/hicolor/{16x16,32x32,48x48,64x64,128x128,256x256,512x512,scalable}/apps},lib/python3/dist-packages},etc}
 
-# Copy your script
+# Copy your script, plus the modules it imports from its own directory
 cp linux-cru.py linux_cru.AppDir/usr/bin/linux_cru
 chmod +x linux_cru.AppDir/usr/bin/linux_cru
+cp _sudo_prompt.py linux_cru.AppDir/usr/bin/
 
 # Create the desktop entry
 cat > linux_cru.AppDir/usr/share/applications/linux_cru.desktop << 'EOF'
@@ -1,89 +1,579 @@
 #!/usr/bin/env python3
 import tkinter as tk
 from tkinter import ttk, messagebox
+import concurrent.futures
+import ctypes
+import functools
 import subprocess
 import os
+import queue
 import re
-from pathlib import Path
 import sys
 import tempfile
+import threading
 import shutil
+import struct
+import time
 from datetime import datetime
 
-class SudoPrompt:
-    def __init__(self, parent):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("Authentication Required")
-        self.dialog.geometry("300x150")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        # Center the dialog on parent
-        if parent:
-            x = parent.winfo_x() + (parent.winfo_width() // 2) - (300 // 2)
-            y = parent.winfo_y() + (parent.winfo_height() // 2) - (150 // 2)
-            self.dialog.geometry(f"+{x}+{y}")
-        
-        style = ttk.Style()
-        style.configure("Auth.TLabel", font=("TkDefaultFont", 10))
-        
-        ttk.Label(self.dialog, 
-                 text="Administrator privileges are required\nto modify display settings.",
-                 style="Auth.TLabel",
-                 justify="center").pack(pady=10)
-        
-        self.password = tk.StringVar()
-        self.entry = ttk.Entry(self.dialog, show="●", textvariable=self.password)
-        self.entry.pack(pady=10, padx=20, fill=tk.X)
-        
-        btn_frame = ttk.Frame(self.dialog)
-        btn_frame.pack(fill=tk.X, pady=10, padx=20)
-        
-        ttk.Button(btn_frame, text="OK", 
-                  command=self.dialog.quit).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(btn_frame, text="Cancel", 
-                  command=self.cancel).pack(side=tk.RIGHT, padx=5)
-        
-        self.entry.bind('<Return>', lambda e: self.dialog.quit())
-        self.entry.focus()
+# Connected output in `xrandr --current` output with its indented mode table, e.g.
+# "HDMI-0 connected primary 1920x1080+0+0 ..." (but not "+HDMI-0" monitor lines)
+_RE_CONNECTED = re.compile(rb'^(?!\+)(\S+) connected\b.*((?:\n[ \t].*)*)', re.M)
+# Active mode in an xrandr mode table, e.g. "   1920x1080     60.00*+"
+_RE_CURRENT_MODE = re.compile(rb'(\d+)x(\d+).*?([\d\.]+)\*')
+
+# xorg.conf.d snippet written to /etc/X11/xorg.conf.d/10-custom-modes.conf,
+# below its "# Generated by Linux CRU" line
+_XORG_TEMPLATE = """
+Section "Monitor"
+    Identifier "{display}"
+    Option "PreferredMode" "{mode_name}"
+    Modeline "{mode_name}" {modeline}
+    Option "ExactModeTimingsDVI" "True"{force_options}
+EndSection
+
+Section "Screen"
+    Identifier "Screen0"
+    Device "Device0"
+    Monitor "{display}"
+    Option "AllowIndirectGLXProtocol" "off"
+    Option "TripleBuffer" "on"
+EndSection
+"""
+
+# Line of _XORG_TEMPLATE that the force-enable options are appended to
+_FORCE_ANCHOR = 'Option "ExactModeTimingsDVI" "True"'
+
+# Kernel module options written to /etc/modprobe.d/nvidia.conf
+_NVIDIA_TEMPLATE = 'options nvidia NVreg_RegistryDwords="CustomEDID={mode_name};EnableBrightnessControl=1"\n'
+
+# First line of the xorg config and the preview
+_HEADER_TEMPLATE = "# Generated by Linux CRU on {timestamp:%Y-%m-%d %H:%M:%S}\n"
+
+# Preview text below the header: both files, the nvidia part labelled
+_PREVIEW_TEMPLATE = "{xorg}\n# Kernel module configuration (/etc/modprobe.d/nvidia.conf):\n{nvidia}"
+
+# Bound once so rendering is a single call per piece
+_render_header = _HEADER_TEMPLATE.format
+_render_xorg = _XORG_TEMPLATE.format
+_render_nvidia = _NVIDIA_TEMPLATE.format
+_render_preview = _PREVIEW_TEMPLATE.format
+
+# Dialog shown once apply_configuration has installed the files
+_SUCCESS_TITLE = "Success"
+_SUCCESS_BODY = ("Configuration saved. The changes will take effect\n"
+                 "after you restart your display manager or reboot.")
+
+# Line the apply script writes to stderr once both files are installed.
+# stderr is what a failed run reports back, so after a failure it tells a
+# later step (initramfs, restart) going wrong from nothing being installed.
+_INSTALLED_MARKER = "linux-cru: configuration files installed"
+
+# Files written by the apply script
+_XORG_CONF = '/etc/X11/xorg.conf.d/10-custom-modes.conf'
+_NVIDIA_CONF = '/etc/modprobe.d/nvidia.conf'
+
+def _file_contains(path, content):
+    """Whether the file at path holds exactly content"""
+    try:
+        with open(path) as f:
+            return f.read() == content
+    except OSError:
+        return False
+
+# Script run as root by apply_configuration, with the two files inlined as
+# here-documents. It is fed to `bash -s` on stdin where the helper allows;
+# being one { ... } group, bash reads all of it before running anything and
+# the initramfs tools can't swallow the rest of it from the shared stdin.
+_APPLY_SCRIPT = """{
+# Every failure exits 1: 126 and 127 from a missing or non-executable tool
+# would read as pkexec's own "dismissed" / "not authorized" statuses
+
+# Replace file $1 with stdin. install creates missing directories and sets
+# the mode in the same step; writing next to the file and renaming it over
+# means a crash never leaves a truncated config behind. Only *.conf files
+# are read from these directories, so the temporary name is ignored.
+install_config() {
+    install -D -m 644 /dev/stdin "$1.linux-cru-tmp" &&
+    mv -f "$1.linux-cru-tmp" "$1"
+}
+
+install_config /etc/X11/xorg.conf.d/10-custom-modes.conf <<'LINUX_CRU_XORG_EOF' || exit 1
+@XORG_CONFIG@LINUX_CRU_XORG_EOF
+install_config /etc/modprobe.d/nvidia.conf <<'LINUX_CRU_NVIDIA_EOF' || exit 1
+@NVIDIA_CONFIG@LINUX_CRU_NVIDIA_EOF
+echo "@INSTALLED_MARKER@" >&2
+
+# Arguments: "initramfs" to rebuild the initramfs, "restart" to restart
+# the display manager
+initramfs=0 restart=0
+for arg; do
+    case "$arg" in
+        initramfs) initramfs=1 ;;
+        restart) restart=1 ;;
+    esac
+done
+
+# Check for mkinitcpio or dracut and update initramfs
+status=0
+if [ "$initramfs" = 1 ]; then
+    if command -v mkinitcpio >/dev/null 2>&1; then
+        mkinitcpio -P || status=$?
+    elif command -v dracut >/dev/null 2>&1; then
+        dracut --force || status=$?
+    elif command -v update-initramfs >/dev/null 2>&1; then
+        update-initramfs -u || status=$?
+    else
+        echo "Warning: Could not find mkinitcpio, dracut, or update-initramfs. Initramfs not updated."
+        # Still return success as the xorg config has been updated
+    fi
+fi
+
+# The config files are in place, so restart even if the initramfs update failed
+if [ "$restart" = 1 ]; then
+    systemctl restart display-manager || status=$?
+fi
+exit $(( status ? 1 : 0 ))
+}
+"""
+
+def _run(cmd, **kwargs):
+    """subprocess.run() for the short-lived xrandr/sudo helpers
+
+    Python opens its descriptors non-inheritable (PEP 446) and Tk sets
+    close-on-exec on its own, so the child has nothing to close. Passing
+    close_fds=False skips the descriptor sweep and lets subprocess use
+    posix_spawn when the executable is an absolute path and no cwd is given.
+    """
+    kwargs.setdefault('close_fds', False)
+    return subprocess.run(cmd, **kwargs)
+
+# Graphical privilege elevation helpers that are installed, in order of
+# preference, resolved to absolute paths once at startup
+_ELEVATORS = [path for path in map(shutil.which, ('pkexec', 'gksudo', 'kdesu', 'beesu')) if path]
+
+# Elevation helper that worked last time; later calls go straight to it
+_sudo_cmd = None
+
+# pkexec exit statuses when the user dismissed the authentication dialog, and
+# when authorization could not be obtained (no polkit agent, wrong password)
+_PKEXEC_DISMISSED = 126
+_PKEXEC_NOT_AUTHORIZED = 127
+
+def _write_script(script):
+    """Save script to a private (0600) temporary file and return its path"""
+    fd, path = tempfile.mkstemp(prefix="linux_cru_", suffix=".sh")
+    with os.fdopen(fd, 'w') as f:
+        f.write(script)
+    return path
+
+def run_with_sudo(script, args=(), parent=None):
+    """Run the bash script as root with args, returning (success, output)
+
+    pkexec passes its stdin on, so the script is streamed to `bash -s`.
+    gksudo, kdesu and beesu run the command through their own su/pty wrapper
+    and drop stdin; they get the script as a file root can read instead.
+    """
+    global _sudo_cmd
+    if not _ELEVATORS:
+        return run_with_password_prompt(script, args, parent)
+    
+    script_path = None
+    try:
+        # Reuse the helper that worked before, otherwise try pkexec first
+        # and then the graphical sudo alternatives
+        for sudo_cmd in [_sudo_cmd] if _sudo_cmd else _ELEVATORS:
+            is_pkexec = os.path.basename(sudo_cmd) == 'pkexec'
+            if is_pkexec:
+                result = _run([sudo_cmd, '/bin/bash', '-s', *args], input=script,
+                              capture_output=True, text=True)
+            else:
+                if script_path is None:
+                    script_path = _write_script(script)
+                result = _run([sudo_cmd, '/bin/bash', script_path, *args],
+                              capture_output=True, text=True)
+            
+            if result.returncode == 0:
+                _sudo_cmd = sudo_cmd
+                return True, result.stdout
+            
+            if is_pkexec:
+                if result.returncode == _PKEXEC_DISMISSED:
+                    return False, "Authentication cancelled"
+                if result.returncode == _PKEXEC_NOT_AUTHORIZED:
+                    # pkexec couldn't elevate, another helper might
+                    continue
+            
+            # The helper worked but the command itself failed; running it
+            # again through the next helper would only prompt a second time
+            _sudo_cmd = sudo_cmd
+            return False, result.stderr or result.stdout
         
-    def cancel(self):
-        self.password.set("")
-        self.dialog.quit()
+        return False, result.stderr or result.stdout
+    except Exception as e:
+        return False, str(e)
+    finally:
+        if script_path:
+            os.unlink(script_path)
 
-def run_with_sudo(command, work_dir=None):
+def run_with_password_prompt(script, args=(), parent=None):
+    """Run the bash script as root with sudo, asking for the password in a dialog over parent
+
+    The password and the script never share stdin: `sudo -v` gets only the
+    password and caches the credentials, then `sudo -n` runs `bash -s` with
+    the script on stdin and fails rather than prompt if they weren't cached.
+    """
+    if parent is None or not shutil.which('sudo'):
+        return False, "No graphical sudo helper (pkexec, gksudo, kdesu, beesu) found"
+    
     try:
-        # First try pkexec
-        cmd = ['pkexec'] + command
-        process = subprocess.Popen(cmd,
-                                 stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE,
-                                 cwd=work_dir)
-        output, error = process.communicate()
-        
-        if process.returncode == 0:
-            return True, output.decode()
-        
-        # If pkexec fails, try with graphical sudo alternatives
-        for sudo_cmd in ['gksudo', 'kdesu', 'beesu']:
-            try:
-                cmd = [sudo_cmd] + command
-                process = subprocess.Popen(cmd,
-                                        stdout=subprocess.PIPE,
-                                        stderr=subprocess.PIPE,
-                                        cwd=work_dir)
-                output, error = process.communicate()
-                
-                if process.returncode == 0:
-                    return True, output.decode()
-            except FileNotFoundError:
-                continue
+        # No password needed (NOPASSWD or credentials still cached)
+        cached = _run(['sudo', '-n', '-v'], capture_output=True, text=True)
+        if cached.returncode != 0:
+            # Only needed on systems without a graphical helper, so loaded on demand
+            from _sudo_prompt import ask_password
+            password = ask_password(parent)
+            if not password:
+                return False, "Authentication cancelled"
+            
+            auth = _run(['sudo', '-S', '-p', '', '-v'],
+                        input=password + "\n", capture_output=True, text=True)
+            if auth.returncode != 0:
+                return False, auth.stderr or "Authentication failed"
         
-        return False, error.decode()
+        result = _run(['sudo', '-n', '--', '/bin/bash', '-s', *args],
+                      input=script, capture_output=True, text=True)
+        if result.returncode == 0:
+            return True, result.stdout
+        return False, result.stderr or result.stdout
     except Exception as e:
         return False, str(e)
 
+def _f32(value):
+    """Round value to single precision, as cvt does for its float variables"""
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+def _cvt_vsync(width, height):
+    """VSync width in lines, derived from the aspect ratio as in the CVT standard"""
+    if height % 3 == 0 and height * 4 // 3 == width:
+        return 4
+    if height % 9 == 0 and height * 16 // 9 == width:
+        return 5
+    if height % 10 == 0 and height * 16 // 10 == width:
+        return 6
+    if height % 4 == 0 and height * 5 // 4 == width:
+        return 7
+    if height % 9 == 0 and height * 15 // 9 == width:
+        return 7
+    return 10
+
+def _cvt_format(clock, width, hsync_start, hsync_end, h_total,
+                height, vsync_start, vsync_end, v_total, flags):
+    # Same layout as the timings part of cvt's "Modeline" line
+    return (f"{clock / 1000:.2f}  {width} {hsync_start} {hsync_end} {h_total}  "
+            f"{height} {vsync_start} {vsync_end} {v_total} {flags}")
+
+def _cvt_standard(width, height, refresh):
+    """CVT 1.1 timings for a mode, matching the output of `cvt width height refresh`"""
+    # Port of xf86CVTMode() from the X server, which computes in single precision
+    width = (width + 7) & ~7  # cvt rounds the width up to the 8 pixel cell
+    refresh = _f32(refresh)
+    v_sync = _cvt_vsync(width, height)
+    
+    # Estimated horizontal period (us) and vsync + back porch lines
+    h_period = _f32(_f32(1000000.0 / refresh - 550.0) / (height + 3))
+    v_sync_bp = max(int(550.0 / h_period) + 1, v_sync + 3)
+    v_total = height + v_sync_bp + 3
+    
+    # Ideal blanking duty cycle, C' = 30 and M' = 300
+    h_blank_pct = max(_f32(30 - _f32(300 * h_period) / 1000.0), 20)
+    h_blank = int(_f32(width * h_blank_pct) / (100.0 - h_blank_pct))
+    h_blank -= h_blank % 16
+    h_total = width + h_blank
+    
+    hsync_end = width + h_blank // 2
+    hsync_start = hsync_end - (h_total * 8) // 100
+    hsync_start += 8 - hsync_start % 8
+    
+    clock = int(h_total * 1000.0 / h_period)  # kHz, in 250 kHz steps
+    clock -= clock % 250
+    
+    return _cvt_format(clock, width, hsync_start, hsync_end, h_total,
+                       height, height + 3, height + 3 + v_sync, v_total,
+                       "-hsync +vsync")
+
+def _cvt_reduced(width, height, refresh):
+    """CVT reduced blanking timings, matching `cvt -r width height refresh`
+
+    Returns None for refresh rates cvt refuses (anything but multiples of 60 Hz).
+    """
+    width = (width + 7) & ~7
+    if refresh % 60:
+        return None
+    refresh = _f32(refresh)
+    v_sync = _cvt_vsync(width, height)
+    
+    # Estimated horizontal period (us), 460 us minimum vertical blanking
+    h_period = _f32(_f32(1000000.0 / refresh - 460.0) / height)
+    vbi_lines = max(int(_f32(_f32(460.0 / h_period) + 1)), 3 + v_sync + 6)
+    v_total = height + vbi_lines
+    
+    # Fixed 160 pixel horizontal blanking with a 32 pixel sync
+    h_total = width + 160
+    hsync_end = width + 80
+    
+    clock = int(h_total * 1000.0 / h_period)
+    clock -= clock % 250
+    
+    return _cvt_format(clock, width, hsync_end - 32, hsync_end, h_total,
+                       height, height + 3, height + 3 + v_sync, v_total,
+                       "+hsync -vsync")
+
+def cvt_modeline(width, height, refresh, reduced=False):
+    """Return CVT (or CVT-RB) modeline timings, or None if CVT-RB doesn't apply"""
+    if reduced:
+        return _cvt_reduced(width, height, refresh)
+    return _cvt_standard(width, height, refresh)
+
+@functools.lru_cache(maxsize=64)
+def calculate_cvt_rb2_modeline(width, height, refresh):
+    """Calculate CVT-RBv2 modeline parameters based on resolution and refresh rate"""
+    # Reduced blanking v2 from VESA CVT 1.2: fixed 80 pixel horizontal
+    # blanking and a fixed vertical back porch, the front porch absorbs the rest
+    us_per_second = 1_000_000
+    min_vblank = 460   # Microseconds
+    h_front_porch = 8
+    h_sync_width = 32
+    h_blank = 80
+    v_sync = 8
+    v_back_porch = 6
+    min_v_front_porch = 1
+    
+    # Estimated line period, then the lines needed to cover the minimum blanking time
+    h_period_est = (us_per_second / refresh - min_vblank) / height
+    v_blank = max(int(min_vblank / h_period_est) + 1,
+                  min_v_front_porch + v_sync + v_back_porch)
+    v_front_porch = v_blank - v_sync - v_back_porch
+    
+    h_total = width + h_blank
+    v_total = height + v_blank
+    
+    # Pixel clock in 1 kHz steps
+    clock_khz = int(refresh * h_total * v_total) // 1000
+    
+    return (f"{clock_khz / 1000:.3f} {width} {width + h_front_porch} "
+            f"{width + h_front_porch + h_sync_width} {h_total} "
+            f"{height} {height + v_front_porch} "
+            f"{height + v_front_porch + v_sync} {v_total} "
+            f"+HSync -VSync")
+
+@functools.lru_cache(maxsize=32)
+def _rb_timings(width, height):
+    """Porch and sync sizes of the conservative reduced blanking mode
+
+    Returns (h_front, h_sync, h_back, v_front, v_sync, v_back); each porch is
+    max(minimum, size // divisor), written as a comparison against the size
+    at which the two meet.
+    """
+    h_front = 16 if width < 1600 else width // 100
+    h_sync = 32 if width < 2560 else width // 80
+    h_back = 48 if width < 2400 else width // 50
+    v_back = 3 if height < 600 else height // 200
+    return h_front, h_sync, h_back, 1, 1, v_back
+
+# Porch and sync sizes used for CVT-RB when the CVT calculation gives no result
+_CVT_RB_FALLBACK = (48, 32, 80, 3, 10, 33)
+
+def _porch_modeline(width, height, refresh, timings, polarity):
+    """Modeline for fixed porch and sync sizes at a whole-number refresh rate
+
+    The pixel clock is kept in integer 10 kHz units and rounded half up, so
+    no float arithmetic or float formatting is involved.
+    """
+    h_front, h_sync, h_back, v_front, v_sync, v_back = timings
+    h_total = width + h_front + h_sync + h_back
+    v_total = height + v_front + v_sync + v_back
+    clock = (h_total * v_total * refresh + 5000) // 10000
+    return "%d.%02d %d %d %d %d %d %d %d %d %s" % (
+        clock // 100, clock % 100,
+        width, width + h_front, width + h_front + h_sync, h_total,
+        height, height + v_front, height + v_front + v_sync, v_total,
+        polarity)
+
+@functools.lru_cache(maxsize=128)
+def _compute_modeline(width, height, refresh, reduced, mtype):
+    """Modeline timings for a mode; pure, so results are memoized on the inputs"""
+    if reduced:
+        # Conservative reduced blanking parameters
+        return _porch_modeline(width, height, refresh, _rb_timings(width, height), "-HSync +VSync")
+    elif mtype == "cvt-rb":
+        # Use CVT with reduced blanking
+        modeline = cvt_modeline(width, height, refresh, reduced=True)
+        if modeline:
+            return modeline
+        return _porch_modeline(width, height, refresh, _CVT_RB_FALLBACK, "+HSync -VSync")
+    elif mtype == "cvt-rb2":
+        # Use CVT-RBv2 calculation for higher compatibility with modern displays
+        return calculate_cvt_rb2_modeline(width, height, refresh)
+    elif mtype == "custom":
+        # Special case for Samsung OLED TVs (like S95B)
+        if width == 3840 and height == 2160 and 120 <= refresh <= 144:
+            # Samsung S95B OLED TV 4K@144Hz special modeline
+            return "1306.206 3840 3848 3880 3920 2160 2300 2308 2314 +HSync -VSync"
+        else:
+            # Conservative reduced blanking parameters as fallback
+            return _porch_modeline(width, height, refresh, _rb_timings(width, height), "-HSync +VSync")
+    else:
+        # Standard CVT parameters
+        return cvt_modeline(width, height, refresh)
+
+class _XRRScreenResources(ctypes.Structure):
+    _fields_ = [('timestamp', ctypes.c_ulong),
+                ('configTimestamp', ctypes.c_ulong),
+                ('ncrtc', ctypes.c_int),
+                ('crtcs', ctypes.POINTER(ctypes.c_ulong)),
+                ('noutput', ctypes.c_int),
+                ('outputs', ctypes.POINTER(ctypes.c_ulong)),
+                ('nmode', ctypes.c_int),
+                ('modes', ctypes.c_void_p)]
+
+class _XRROutputInfo(ctypes.Structure):
+    # Leading fields only; the struct is always allocated by libXrandr
+    _fields_ = [('timestamp', ctypes.c_ulong),
+                ('crtc', ctypes.c_ulong),
+                ('name', ctypes.c_void_p),
+                ('nameLen', ctypes.c_int),
+                ('mm_width', ctypes.c_ulong),
+                ('mm_height', ctypes.c_ulong),
+                ('connection', ctypes.c_ushort)]
+
+_RR_CONNECTED = 0
+
+@functools.lru_cache(maxsize=None)
+def _xrandr_libs():
+    """libX11 and libXrandr with their prototypes set up, or None if missing
+
+    Loaded and declared once; later display probes reuse the same handles
+    and function pointers.
+    """
+    try:
+        xlib = ctypes.CDLL("libX11.so.6")
+        xrandr = ctypes.CDLL("libXrandr.so.2")
+    except OSError:
+        return None
+    
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    resources_p = ctypes.POINTER(_XRRScreenResources)
+    output_info_p = ctypes.POINTER(_XRROutputInfo)
+    int_p = ctypes.POINTER(ctypes.c_int)
+    xrandr.XRRQueryExtension.argtypes = [ctypes.c_void_p, int_p, int_p]
+    xrandr.XRRQueryExtension.restype = ctypes.c_int
+    xrandr.XRRQueryVersion.argtypes = [ctypes.c_void_p, int_p, int_p]
+    xrandr.XRRQueryVersion.restype = ctypes.c_int
+    xrandr.XRRGetScreenResourcesCurrent.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xrandr.XRRGetScreenResourcesCurrent.restype = resources_p
+    xrandr.XRRGetOutputInfo.argtypes = [ctypes.c_void_p, resources_p, ctypes.c_ulong]
+    xrandr.XRRGetOutputInfo.restype = output_info_p
+    xrandr.XRRFreeOutputInfo.argtypes = [output_info_p]
+    xrandr.XRRFreeScreenResources.argtypes = [resources_p]
+    return xlib, xrandr
+
+# Held for the whole of a display probe. Xlib is not initialised with
+# XInitThreads, and libXrandr keeps its per-display extension data in a
+# process-wide list, so two probes on the worker pool must not overlap
+_xrandr_lock = threading.Lock()
+
+def get_connected_outputs():
+    """Names of the connected RandR outputs, or None if libXrandr can't be used
+
+    Uses XRRGetScreenResourcesCurrent, which returns the server's cached
+    state instead of polling the hardware like XRRGetScreenResources does.
+    """
+    libs = _xrandr_libs()
+    if libs is None:
+        return None
+    with _xrandr_lock:
+        return _query_connected_outputs(*libs)
+
+def _query_connected_outputs(xlib, xrandr):
+    """get_connected_outputs() body; the caller holds _xrandr_lock"""
+    # A private connection keeps the probe away from Tk's own X connection;
+    # the lock keeps it away from other probes
+    dpy = xlib.XOpenDisplay(None)
+    if not dpy:
+        return None
+    try:
+        # RandR requests on a server without the extension (or before 1.3,
+        # which added GetScreenResourcesCurrent) raise an X error, and Xlib's
+        # default handler exits the process; use the xrandr tool instead
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not xrandr.XRRQueryExtension(dpy, ctypes.byref(event_base), ctypes.byref(error_base)):
+            return None
+        major, minor = ctypes.c_int(), ctypes.c_int()
+        if (not xrandr.XRRQueryVersion(dpy, ctypes.byref(major), ctypes.byref(minor))
+                or (major.value, minor.value) < (1, 3)):
+            return None
+        
+        resources = xrandr.XRRGetScreenResourcesCurrent(dpy, xlib.XDefaultRootWindow(dpy))
+        if not resources:
+            return None
+        try:
+            outputs = []
+            for i in range(resources.contents.noutput):
+                info = xrandr.XRRGetOutputInfo(dpy, resources, resources.contents.outputs[i])
+                if not info:
+                    continue
+                if info.contents.connection == _RR_CONNECTED:
+                    name = ctypes.string_at(info.contents.name, info.contents.nameLen)
+                    outputs.append(name.decode(errors='replace'))
+                xrandr.XRRFreeOutputInfo(info)
+            return outputs
+        finally:
+            xrandr.XRRFreeScreenResources(resources)
+    finally:
+        xlib.XCloseDisplay(dpy)
+
+def parse_xrandr(output):
+    """Parse `xrandr --current` output into the connected displays and their current modes
+
+    output is the raw bytes from xrandr; only the matched names and numbers
+    are decoded, not the whole mode listing.
+    """
+    displays = {}
+    current_modes = {}
+    for match in _RE_CONNECTED.finditer(output):
+        display, mode_table = match.groups()
+        display = display.decode()
+        if display in displays:  # Avoid duplicates
+            continue
+        displays[display] = None
+        
+        # The active mode is marked with "*"
+        mode = _RE_CURRENT_MODE.search(mode_table)
+        if mode:
+            current_modes[display] = tuple(group.decode() for group in mode.groups())
+    return list(displays), current_modes
+
 class LinuxCRU:
+    # Display combobox entry while the outputs are being detected
+    _DETECTING = "(detecting...)"
+    # Offered when no connected output can be detected
+    _DEFAULT_DISPLAYS = ("HDMI-0",)
+    
+    # Monitor options appended after _FORCE_ANCHOR when Force Enable Mode is on
+    _FORCE_ON = """
+    Option "ModeValidation" "AllowNonEdidModes,NoMaxPClkCheck,NoEdidMaxPClkCheck,NoMaxSizeCheck,NoHorizSyncCheck,NoVertRefreshCheck"
+    Option "IgnoreEDID" "True\""""
+    _FORCE_OFF = ""
+    
+    # Seconds before an xrandr query is given up; a wedged driver can
+    # otherwise keep a worker busy forever
+    _XRANDR_TIMEOUT = 5
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Linux Custom Resolution Utility")
@@ -96,23 +586,50 @@ class LinuxCRU:
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_rowconfigure(0, weight=1)
         
+        # Worker pool for xrandr/pkexec calls so they don't block the mainloop
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Finished (callback, future) pairs; workers only put to the queue
+        # and post <<CmdDone>>, the callbacks run on the Tk thread
+        self._done_queue = queue.SimpleQueue()
+        self.root.bind("<<CmdDone>>", self._run_done_callbacks)
+        # Posted by _sudo_prompt when a worker needs the sudo password
+        self.root.bind("<<AskPassword>>", self._show_password_prompt)
+        
+        # xrandr output keyed by arguments, as (time.monotonic(), output),
+        # and the connected displays found by get_displays
+        self._xrandr_cache = {}
+        self._displays_cache = None
+        
+        # Pending debounced generate_preview call, and whether an entry changed
+        # since the last idle flush
+        self._preview_after_id = None
+        self._dirty = False
+        
+        # Set once the window is built; until then the single initial
+        # generate_preview covers any variable writes
+        self._ready = False
+        
+        # Config files rendered by the last generate_preview, keyed by
+        # "xorg" and "nvidia"
+        self._last_cfg = None
+        self._xorg_parts = None
+        # Inputs the preview was last generated from
+        self._last_preview_key = None
+        
         # Set window icon if running as AppImage
         if getattr(sys, 'frozen', False):
             icon_path = os.path.join(os.path.dirname(sys.executable), 
                                    'usr/share/icons/hicolor/256x256/apps/linux_cru.png')
-            if os.path.exists(icon_path):
-                img = tk.PhotoImage(file=icon_path)
-                self.root.tk.call('wm', 'iconphoto', self.root._w, img)
+            # Decoding the PNG can wait until the window has been drawn
+            self.root.after_idle(self._load_icon, icon_path)
         
         # Create main container with padding
         self.main_frame = ttk.Frame(root, padding="10")
         self.main_frame.grid(row=0, column=0, sticky="nsew")
         self.main_frame.grid_columnconfigure(0, weight=1)
         
-        # Style configuration
-        style = ttk.Style()
-        style.configure('Header.TLabel', font=('TkDefaultFont', 12, 'bold'))
-        
         # Create the interface sections
         self.create_display_section()
         self.create_resolution_section()
@@ -120,73 +637,172 @@ class LinuxCRU:
         self.create_preview_section()
         self.create_action_section()
         
-        # Initialize state
-        self.last_valid_width = "1280"
-        self.last_valid_height = "1024"
-        self.last_valid_refresh = "165"
-        
         # Generate initial preview
         self.generate_preview()
         
         # Bind validation and preview update
         self.bind_validators()
+        self._ready = True
+
+    def _load_icon(self, icon_path):
+        """Set the window icon from icon_path, if it exists"""
+        if os.path.exists(icon_path):
+            # Kept on self, Tk drops the image once the PhotoImage is collected
+            self._icon = tk.PhotoImage(file=icon_path)
+            self.root.iconphoto(False, self._icon)
+
+    def run_in_background(self, func, *args, callback=None):
+        """Run func(*args) on the worker pool and hand its future to callback on the Tk thread"""
+        future = self.pool.submit(func, *args)
+        if callback:
+            future.add_done_callback(lambda f: self._post_done(callback, f))
+        return future
+
+    def _post_done(self, callback, future):
+        """Queue callback(future) for the Tk thread (called from the worker)"""
+        if future.cancelled():
+            return
+        self._done_queue.put((callback, future))
+        try:
+            self.root.event_generate("<<CmdDone>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            pass  # The window is gone
+
+    def _show_password_prompt(self, event=None):
+        """Show the sudo password dialog a worker has asked for"""
+        # Already imported by the worker that posted the event
+        from _sudo_prompt import show_pending
+        show_pending(self.root)
+
+    def _run_done_callbacks(self, event=None):
+        """Run the callbacks of finished background work"""
+        while True:
+            try:
+                callback, future = self._done_queue.get_nowait()
+            except queue.Empty:
+                return
+            # Report a failing callback the way Tk reports errors in its own
+            # callbacks, and carry on with the rest of the queue
+            try:
+                callback(future)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+    def _cached_xrandr(self, args, ttl=2.0):
+        """Return the raw output of xrandr with args, reusing a result younger than ttl seconds"""
+        key = tuple(args)
+        cached = self._xrandr_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
+        output = _run(['xrandr'] + list(args), capture_output=True,
+                      check=True, timeout=self._XRANDR_TIMEOUT).stdout
+        self._xrandr_cache[key] = (time.monotonic(), output)
+        return output
+
+    def invalidate_xrandr_cache(self):
+        """Forget cached xrandr output so the next query sees the new display state"""
+        self._xrandr_cache.clear()
+        self._displays_cache = None
+
+    def on_close(self):
+        """Stop the worker pool and close the window"""
+        # Drop a pending debounced preview along with the queued work
+        if self._preview_after_id:
+            self.root.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+        # A worker may be waiting for the sudo password dialog
+        if '_sudo_prompt' in sys.modules:
+            sys.modules['_sudo_prompt'].cancel_pending()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
     def create_display_section(self):
         display_frame = ttk.LabelFrame(self.main_frame, text="Display Selection", padding=5)
         display_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
         
-        self.displays = self.get_displays()
-        self.display_var = tk.StringVar(value=self.displays[0] if self.displays else "")
+        # Shown until get_displays has returned
+        self.displays = [self._DETECTING]
+        self.display_var = tk.StringVar(value=self._DETECTING)
         
-        display_combo = ttk.Combobox(display_frame, 
+        self.display_combo = ttk.Combobox(display_frame, 
                                    textvariable=self.display_var,
                                    values=self.displays,
                                    state="readonly")
-        display_combo.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        self.display_combo.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
         display_frame.grid_columnconfigure(0, weight=1)
         
         # Refresh button to get current resolution
         ttk.Button(display_frame, text="Get Current Settings", command=self.get_current_resolution).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Button(display_frame, text="Refresh Displays", command=self.refresh_displays).grid(row=0, column=2, padx=5, pady=5)
+        
+        self.display_combo.bind('<<ComboboxSelected>>', lambda e: self._schedule_preview())
+        
+        # Detect displays in the background once the window has been drawn;
+        # the combobox is filled in when xrandr returns
+        self.root.after_idle(lambda: self.run_in_background(self.get_displays, callback=self._set_displays))
+
+    def refresh_displays(self):
+        """Detect the connected displays again, e.g. after plugging in a monitor"""
+        self.invalidate_xrandr_cache()
+        self.run_in_background(self.get_displays, callback=self._set_displays)
+
+    def _set_displays(self, future):
+        """Populate the display combobox with the result of get_displays"""
+        first = self.display_var.get() == self._DETECTING
+        try:
+            self.displays = future.result()
+            error = None
+        except Exception as e:
+            self.displays = list(self._DEFAULT_DISPLAYS)
+            error = e
         
-        display_combo.bind('<<ComboboxSelected>>', lambda e: self.generate_preview())
+        self.display_combo.configure(values=self.displays)
+        if self.display_var.get() not in self.displays:
+            self.display_var.set(self.displays[0])
+            self.generate_preview()
+        if first:
+            self.apply_button.state(['!disabled'])
+        if error:
+            self.status_var.set(f"Could not detect displays: {error}")
 
     def create_resolution_section(self):
         res_frame = ttk.LabelFrame(self.main_frame, text="Resolution Settings", padding=5)
         res_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
         res_frame.grid_columnconfigure(1, weight=1)
         
-        # Resolution inputs
-        ttk.Label(res_frame, text="Width:").grid(row=0, column=0, padx=5, pady=5)
+        # Resolution inputs, one label / entry / unit row each
         self.width_var = tk.StringVar(value="1280")
-        width_entry = ttk.Entry(res_frame, textvariable=self.width_var, width=8)
-        width_entry.grid(row=0, column=1, sticky="w", padx=5, pady=5)
-        
-        ttk.Label(res_frame, text="Height:").grid(row=1, column=0, padx=5, pady=5)
         self.height_var = tk.StringVar(value="1024")
-        height_entry = ttk.Entry(res_frame, textvariable=self.height_var, width=8)
-        height_entry.grid(row=1, column=1, sticky="w", padx=5, pady=5)
-        
-        ttk.Label(res_frame, text="Refresh Rate:").grid(row=2, column=0, padx=5, pady=5)
         self.refresh_var = tk.StringVar(value="165")
-        refresh_entry = ttk.Entry(res_frame, textvariable=self.refresh_var, width=8)
-        refresh_entry.grid(row=2, column=1, sticky="w", padx=5, pady=5)
-        
-        ttk.Label(res_frame, text="pixels").grid(row=0, column=2, sticky="w", padx=5)
-        ttk.Label(res_frame, text="pixels").grid(row=1, column=2, sticky="w", padx=5)
-        ttk.Label(res_frame, text="Hz").grid(row=2, column=2, sticky="w", padx=5)
+        rows = (("Width:", self.width_var, "pixels"),
+                ("Height:", self.height_var, "pixels"),
+                ("Refresh Rate:", self.refresh_var, "Hz"))
+        for row, (label, var, unit) in enumerate(rows):
+            ttk.Label(res_frame, text=label).grid(row=row, column=0, padx=5, pady=5)
+            ttk.Entry(res_frame, textvariable=var, width=8).grid(row=row, column=1, sticky="w", padx=5, pady=5)
+            ttk.Label(res_frame, text=unit).grid(row=row, column=2, sticky="w", padx=5)
 
     def get_current_resolution(self):
         """Get current resolution and refresh rate of the selected display"""
+        self.run_in_background(self.read_current_resolution, self.display_var.get(),
+                               callback=self._set_current_resolution)
+
+    def read_current_resolution(self, display):
+        """Query xrandr for the current mode of display (runs on the worker pool)"""
+        _, current_modes = parse_xrandr(self._cached_xrandr(['--current']))
+        return current_modes.get(display)
+
+    def _set_current_resolution(self, future):
+        """Copy the mode returned by read_current_resolution into the entries"""
         try:
-            display = self.display_var.get()
-            output = subprocess.check_output(['xrandr', '--verbose'], universal_newlines=True)
-            for line in output.splitlines():
-                if display in line and "*current" in line:
-                    match = re.search(r'(\d+)x(\d+).*?([\d\.]+)\*', line)
-                    if match:
-                        self.width_var.set(match.group(1))
-                        self.height_var.set(match.group(2))
-                        self.refresh_var.set(match.group(3))
+            mode = future.result()
+            if mode:
+                width, height, refresh = mode
+                self.width_var.set(width)
+                self.height_var.set(height)
+                # The refresh entry only accepts whole numbers
+                self.refresh_var.set(str(round(float(refresh))))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to get current resolution: {str(e)}")
 
@@ -205,14 +821,14 @@ class LinuxCRU:
         rb_check = ttk.Checkbutton(options_frame, 
                                  text="Use Reduced Blanking (recommended for high refresh rates)",
                                  variable=self.reduced_blanking,
-                                 command=self.generate_preview)
+                                 command=self._schedule_preview)
         rb_check.grid(row=0, column=0, sticky="w", pady=(0, 5))
         
         self.force_enable = tk.BooleanVar(value=True)
         fe_check = ttk.Checkbutton(options_frame,
                                  text="Force Enable Mode (override EDID restrictions)",
                                  variable=self.force_enable,
-                                 command=self.generate_preview)
+                                 command=self.toggle_force_options)
         fe_check.grid(row=1, column=0, sticky="w")
 
         # Add modeline type selection
@@ -226,25 +842,32 @@ class LinuxCRU:
                         text="Auto", 
                         variable=self.modeline_type, 
                         value="auto",
-                        command=self.generate_preview).grid(row=0, column=0, sticky="w", padx=(0, 10))
+                        command=self._schedule_preview).grid(row=0, column=0, sticky="w", padx=(0, 10))
         
         ttk.Radiobutton(modeline_frame, 
                         text="CVT-RB", 
                         variable=self.modeline_type, 
                         value="cvt-rb",
-                        command=self.generate_preview).grid(row=0, column=1, sticky="w", padx=(0, 10))
+                        command=self._schedule_preview).grid(row=0, column=1, sticky="w", padx=(0, 10))
         
         ttk.Radiobutton(modeline_frame, 
                         text="CVT-RBv2", 
                         variable=self.modeline_type, 
                         value="cvt-rb2",
-                        command=self.generate_preview).grid(row=0, column=2, sticky="w", padx=(0, 10))
+                        command=self._schedule_preview).grid(row=0, column=2, sticky="w", padx=(0, 10))
         
         ttk.Radiobutton(modeline_frame, 
                         text="Custom", 
                         variable=self.modeline_type, 
                         value="custom",
-                        command=self.generate_preview).grid(row=0, column=3, sticky="w")
+                        command=self._schedule_preview).grid(row=0, column=3, sticky="w")
+        
+        # Only needed when the nvidia module is loaded from the initramfs, and
+        # rebuilding it makes Apply take much longer
+        self.rebuild_initramfs = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame,
+                        text="Rebuild initramfs (if the nvidia module loads from the initramfs)",
+                        variable=self.rebuild_initramfs).grid(row=4, column=0, sticky="w", pady=(10, 0))
 
     def create_preview_section(self):
         preview_frame = ttk.LabelFrame(self.main_frame, text="Configuration Preview", padding=5)
@@ -252,7 +875,10 @@ class LinuxCRU:
         preview_frame.grid_columnconfigure(0, weight=1)
         preview_frame.grid_rowconfigure(0, weight=1)
         
-        self.preview_text = tk.Text(preview_frame, height=12, wrap=tk.NONE)
+        # Read-only: Apply uses the generated config, not the widget contents.
+        # Only generate_preview rewrites it, so it keeps no undo history.
+        self.preview_text = tk.Text(preview_frame, height=12, wrap=tk.NONE, state='disabled',
+                                    undo=False, autoseparators=False, maxundo=0)
         self.preview_text.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         
         # Add scrollbars
@@ -275,9 +901,12 @@ class LinuxCRU:
                   text="Generate Preview",
                   command=self.generate_preview).grid(row=0, column=0, padx=5)
         
-        ttk.Button(button_frame,
-                  text="Apply Configuration",
-                  command=self.apply_configuration).grid(row=0, column=2, padx=5)
+        self.apply_button = ttk.Button(button_frame,
+                                     text="Apply Configuration",
+                                     command=self.apply_configuration)
+        self.apply_button.grid(row=0, column=2, padx=5)
+        # Enabled by _set_displays once there is a real output to write into the config
+        self.apply_button.state(['disabled'])
         
         # Status label
         self.status_var = tk.StringVar()
@@ -287,309 +916,283 @@ class LinuxCRU:
         status_label.grid(row=5, column=0, sticky="ew", pady=5)
 
     def bind_validators(self):
-        def validate_number(var, old_value):
+        def validate_number(var):
+            # Last accepted value, kept here so that each keystroke costs a
+            # single var.get() and a rejected one falls back to the latest
+            # valid entry rather than the initial one
+            last_valid = var.get()
             def callback(*args):
+                nonlocal last_valid
+                value = var.get().strip()
+                if not value:
+                    return
                 try:
-                    value = var.get().strip()
-                    if value:
-                        int_val = int(value)
-                        if int_val <= 0:
-                            var.set(old_value)
-                        else:
-                            self.generate_preview()
+                    valid = int(value) > 0
                 except ValueError:
-                    var.set(old_value)
+                    valid = False
+                if valid:
+                    last_valid = value
+                    self._mark_dirty()
+                else:
+                    var.set(last_valid)
             return callback
         
-        self.width_var.trace_add("write", validate_number(self.width_var, self.last_valid_width))
-        self.height_var.trace_add("write", validate_number(self.height_var, self.last_valid_height))
-        self.refresh_var.trace_add("write", validate_number(self.refresh_var, self.last_valid_refresh))
+        for var in (self.width_var, self.height_var, self.refresh_var):
+            var.trace_add("write", validate_number(var))
+
+    def _schedule_preview(self, delay=150):
+        """Regenerate the preview once input has been idle for delay ms"""
+        if not self._ready:
+            return
+        if self._preview_after_id:
+            self.root.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.root.after(delay, self._run_scheduled_preview)
+
+    def _mark_dirty(self):
+        """Record an entry change; all changes in one event-loop turn share one flush"""
+        if not self._dirty:
+            self._dirty = True
+            self.root.after_idle(self._flush_preview)
+
+    def _flush_preview(self):
+        if self._dirty:
+            self._dirty = False
+            self._schedule_preview()
+
+    def _run_scheduled_preview(self):
+        self._preview_after_id = None
+        self.generate_preview()
 
     def get_displays(self):
         """Get list of connected displays"""
-        try:
-            # Use xrandr -q instead of --listmonitors for more reliable output
-            output = subprocess.check_output(['xrandr', '-q'],
-                                          universal_newlines=True,
-                                          stderr=subprocess.PIPE)
-            
-            # Find all connected displays
-            # Match lines like "HDMI-0 connected" but not when prefixed with +
-            displays = []
-            for line in output.splitlines():
-                if ' connected ' in line and not line.startswith('+'):
-                    display = line.split()[0]
-                    if display not in displays:  # Avoid duplicates
-                        displays.append(display)
-            
-            return displays if displays else ["HDMI-0"]
-        except subprocess.CalledProcessError:
-            return ["HDMI-0"]
-
-    def calculate_cvt_rb2_modeline(self, width, height, refresh):
-        """Calculate CVT-RBv2 modeline parameters based on resolution and refresh rate"""
-        # CVT-RBv2 calculation based on the standard formula
-        # Implementation based on CVT-RBv2 standard
-        
-        # Fixed values for RBv2
-        c_prime = 30  # Cell granularity in pixels
-        margin_in_pixels = 1
-        min_vblank = 460  # Microseconds
-        h_sync_percentage = 0.08
-        
-        # Calculate RBv2 params
-        h_front_porch = 1  # Fixed in RBv2
-        h_sync_width = 8   # Fixed in RBv2
+        if self._displays_cache:
+            return self._displays_cache
         
-        total_active_pixels = width * height
-        h_period_est = ((c_prime - margin_in_pixels) / total_active_pixels) * 1000000 / refresh
-        
-        v_back_porch = int(min_vblank / h_period_est) + 1
-        v_sync = 8  # VSync pulse width
-        v_front_porch = 1  # Fixed in RBv2
-        v_blank = v_front_porch + v_sync + v_back_porch
-        
-        v_total_lines = height + v_blank
-        
-        total_h_pixels = width + h_front_porch + h_sync_width + (width * 0.3)  # Approximate RBv2 calculation
-        total_h_pixels = int(total_h_pixels / c_prime) * c_prime  # Round to cell granularity
-        h_back_porch = total_h_pixels - width - h_front_porch - h_sync_width
-        
-        pixel_clock = total_h_pixels * v_total_lines * refresh / 1000000  # MHz
+        # Ask the X server directly; without libXrandr fall back to the xrandr
+        # tool. Both report the server's current state instead of re-probing
+        # the outputs, which can stall for seconds on some drivers.
+        displays = get_connected_outputs()
+        if displays is None:
+            try:
+                displays, _ = parse_xrandr(self._cached_xrandr(['--current']))
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+                displays = []
         
-        return f"{pixel_clock:.6f} {width} {width + h_front_porch} {width + h_front_porch + h_sync_width} {total_h_pixels} {height} {height + v_front_porch} {height + v_front_porch + v_sync} {v_total_lines} +HSync -VSync"
+        if not displays:
+            return list(self._DEFAULT_DISPLAYS)
+        self._displays_cache = displays
+        return displays
 
-    def calculate_modeline(self, custom_type=None):
+    def calculate_modeline(self, width, height, refresh):
         """Calculate modeline parameters based on resolution and refresh rate"""
-        width = int(self.width_var.get())
-        height = int(self.height_var.get())
-        refresh = float(self.refresh_var.get())
-        
-        if self.reduced_blanking.get():
-            # Conservative reduced blanking parameters
-            h_front = max(16, width // 100)
-            h_sync = max(32, width // 80)
-            h_back = max(48, width // 50)
-            
-            v_front = 1
-            v_sync = 1
-            v_back = max(3, height // 200)
-            
-            h_total = width + h_front + h_sync + h_back
-            v_total = height + v_front + v_sync + v_back
-            
-            pixel_clock = h_total * v_total * refresh / 1000000  # MHz
-            
-            return (f"{pixel_clock:.2f} {width} {width + h_front} "
-                   f"{width + h_front + h_sync} {h_total} "
-                   f"{height} {height + v_front} "
-                   f"{height + v_front + v_sync} {v_total} "
-                   f"-HSync +VSync")
-        elif self.modeline_type.get() == "cvt-rb" or custom_type == "cvt-rb":
-            # Use cvt with reduced blanking
-            try:
-                cvt = subprocess.check_output(
-                    ['cvt', '-r', str(width), str(height), str(refresh)],
-                    universal_newlines=True
-                )
-                modeline = re.search(r'Modeline.*"(.*)"(.*)', cvt)
-                if modeline:
-                    return modeline.group(2).strip()
-            except subprocess.CalledProcessError:
-                pass
-                
-            # Fallback calculations for CVT-RB
-            h_front = 48
-            h_sync = 32
-            h_back = 80
-            
-            v_front = 3
-            v_sync = 10
-            v_back = 33
-            
-            h_total = width + h_front + h_sync + h_back
-            v_total = height + v_front + v_sync + v_back
-            
-            pixel_clock = h_total * v_total * refresh / 1000000  # MHz
-            
-            return (f"{pixel_clock:.2f} {width} {width + h_front} "
-                   f"{width + h_front + h_sync} {h_total} "
-                   f"{height} {height + v_front} "
-                   f"{height + v_front + v_sync} {v_total} "
-                   f"+HSync -VSync")
-        elif self.modeline_type.get() == "cvt-rb2" or custom_type == "cvt-rb2":
-            # Use CVT-RBv2 calculation for higher compatibility with modern displays
-            return self.calculate_cvt_rb2_modeline(width, height, refresh)
-        elif self.modeline_type.get() == "custom" or custom_type == "custom":
-            # Special case for Samsung OLED TVs (like S95B)
-            if width == 3840 and height == 2160 and 120 <= refresh <= 144:
-                # Samsung S95B OLED TV 4K@144Hz special modeline
-                return "1306.206 3840 3848 3880 3920 2160 2300 2308 2314 +HSync -VSync"
-            else:
-                # Conservative reduced blanking parameters as fallback
-                h_front = max(16, width // 100)
-                h_sync = max(32, width // 80)
-                h_back = max(48, width // 50)
-                
-                v_front = 1
-                v_sync = 1
-                v_back = max(3, height // 200)
-                
-                h_total = width + h_front + h_sync + h_back
-                v_total = height + v_front + v_sync + v_back
-                
-                pixel_clock = h_total * v_total * refresh / 1000000  # MHz
-                
-                return (f"{pixel_clock:.2f} {width} {width + h_front} "
-                       f"{width + h_front + h_sync} {h_total} "
-                       f"{height} {height + v_front} "
-                       f"{height + v_front + v_sync} {v_total} "
-                       f"-HSync +VSync")
-        else:
-            # Standard CVT parameters
-            try:
-                cvt = subprocess.check_output(
-                    ['cvt', str(width), str(height), str(refresh)],
-                    universal_newlines=True
-                )
-                modeline = re.search(r'Modeline.*"(.*)"(.*)', cvt)
-                if modeline:
-                    return modeline.group(2).strip()
-            except subprocess.CalledProcessError:
-                return None
+        return _compute_modeline(width, height, refresh,
+                                 self.reduced_blanking.get(),
+                                 self.modeline_type.get())
 
     def generate_preview(self):
-        """Generate configuration preview"""
+        """Generate configuration preview; returns whether it matches the inputs"""
+        size = (self.width_var.get(), self.height_var.get(), self.refresh_var.get())
+        display = self.display_var.get()
+        key = size + (self.reduced_blanking.get(), self.modeline_type.get(),
+                      self.force_enable.get(), display)
+        if key == self._last_preview_key:
+            return True
+        
         try:
-            mode_name = f"{self.width_var.get()}x{self.height_var.get()}_{self.refresh_var.get()}"
-            modeline = self.calculate_modeline()
+            # Parsed once here; the entries only accept whole numbers
+            width, height, refresh = map(int, size)
+            mode_name = f"{width}x{height}_{refresh}"
+            modeline = self.calculate_modeline(width, height, refresh)
             
             if not modeline:
                 raise ValueError("Failed to calculate modeline parameters")
             
-            force_options = """
-    Option "ModeValidation" "AllowNonEdidModes,NoMaxPClkCheck,NoEdidMaxPClkCheck,NoMaxSizeCheck,NoHorizSyncCheck,NoVertRefreshCheck"
-    Option "IgnoreEDID" "True\"""" if self.force_enable.get() else ""
+            force_options = self.force_options()
             
-            config = f"""# Generated by Linux CRU on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Section "Monitor"
-    Identifier "{self.display_var.get()}"
-    Option "PreferredMode" "{mode_name}"
-    Modeline "{mode_name}" {modeline}
-    Option "ExactModeTimingsDVI" "True"{force_options}
-EndSection
-
-Section "Screen"
-    Identifier "Screen0"
-    Device "Device0"
-    Monitor "{self.display_var.get()}"
-    Option "AllowIndirectGLXProtocol" "off"
-    Option "TripleBuffer" "on"
-EndSection
-
-# Kernel module configuration (/etc/modprobe.d/nvidia.conf):
-options nvidia NVreg_RegistryDwords="CustomEDID={mode_name};EnableBrightnessControl=1"
-"""
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(1.0, config)
+            xorg_config = _render_xorg(display=display,
+                                       mode_name=mode_name,
+                                       modeline=modeline,
+                                       force_options=force_options)
+            nvidia_config = _render_nvidia(mode_name=mode_name)
+            
+            # Everything below the timestamp line
+            body = _render_preview(xorg=xorg_config, nvidia=nvidia_config)
+            
+            # Leave the widget alone if only the timestamp would change
+            current = self.preview_text.get('2.0', 'end-1c')
+            if body != current:
+                # Rewrite from the first line that differs
+                old_lines = current.splitlines(keepends=True)
+                new_lines = body.splitlines(keepends=True)
+                unchanged = 0
+                for old_line, new_line in zip(old_lines, new_lines):
+                    if old_line != new_line:
+                        break
+                    unchanged += 1
+                
+                header = _render_header(timestamp=datetime.now())
+                self.preview_text.configure(state='normal')
+                self.preview_text.replace('1.0', '2.0', header)
+                self.preview_text.replace(f"{unchanged + 2}.0", 'end-1c',
+                                          "".join(new_lines[unchanged:]))
+                self.preview_text.configure(state='disabled')
+                self._tag_force_options(force_options)
+                
+                # Apply writes these rather than parsing the preview text; the
+                # xorg config is kept split around the force options so that
+                # toggle_force_options can swap them
+                split_at = xorg_config.index(_FORCE_ANCHOR) + len(_FORCE_ANCHOR)
+                self._xorg_parts = (header + xorg_config[:split_at],
+                                    xorg_config[split_at + len(force_options):])
+                self._last_cfg = {"xorg": header + xorg_config, "nvidia": nvidia_config}
+            
+            self._last_preview_key = key
             
             # Update status
             self.status_var.set("Configuration generated successfully. Click 'Apply Configuration' to use these settings.")
+            return True
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate configuration: {str(e)}")
             self.status_var.set("Error: Failed to generate configuration")
+            return False
+
+    def force_options(self):
+        """xorg Monitor options for Force Enable Mode, or "" when it is off"""
+        return self._FORCE_ON if self.force_enable.get() else self._FORCE_OFF
+
+    def _tag_force_options(self, force_options):
+        """Mark where the force-enable options sit in the preview text"""
+        text = self.preview_text
+        text.tag_remove('force_opts', '1.0', 'end')
+        anchor = text.search(_FORCE_ANCHOR, '1.0', stopindex='end')
+        if not anchor:
+            return
+        
+        # The mark keeps the position while the options are switched off
+        start = text.index(f"{anchor} lineend")
+        text.mark_set('force_opts', start)
+        text.mark_gravity('force_opts', 'left')
+        if force_options:
+            text.tag_add('force_opts', start, f"{start} + {len(force_options)} chars")
+
+    def toggle_force_options(self):
+        """Swap the force-enable options in the preview in place"""
+        text = self.preview_text
+        if self._last_cfg is None or 'force_opts' not in text.mark_names():
+            self._schedule_preview()
+            return
+        
+        force_options = self.force_options()
+        start = text.index('force_opts')
+        tagged = text.tag_ranges('force_opts')
+        end = tagged[1] if tagged else start
+        text.configure(state='normal')
+        text.replace(start, end, force_options, 'force_opts')
+        text.configure(state='disabled')
+        
+        before, after = self._xorg_parts
+        self._last_cfg["xorg"] = before + force_options + after
 
     def apply_configuration(self):
         """Apply the configuration to the system using graphical sudo"""
-        try:
-            config = self.preview_text.get(1.0, tk.END)
-            xorg_config = config.split("# Kernel module configuration")[0].strip()
-            nvidia_config = "options nvidia " + config.split("options nvidia ")[1].strip()
-            
-            # Create temporary directory with random suffix for safety
-            tmp_dir = f"/tmp/linux_cru_{os.getpid()}"
-            os.makedirs(tmp_dir, exist_ok=True)
-            
-            # Write configuration files
-            with open(f"{tmp_dir}/xorg.conf", 'w') as f:
-                f.write(xorg_config)
-            with open(f"{tmp_dir}/nvidia.conf", 'w') as f:
-                f.write(nvidia_config)
-            
-            # Create helper script
-            script_path = f"{tmp_dir}/apply_config.sh"
-            with open(script_path, 'w') as f:
-                f.write("""#!/bin/bash -e
-set -e
-mkdir -p /etc/X11/xorg.conf.d
-cp "${1}/xorg.conf" /etc/X11/xorg.conf.d/10-custom-modes.conf 
-cp "${1}/nvidia.conf" /etc/modprobe.d/nvidia.conf 
-chmod 644 /etc/X11/xorg.conf.d/10-custom-modes.conf 
-chmod 644 /etc/modprobe.d/nvidia.conf 
+        # An edit may still be waiting on the debounce; bring the config up to
+        # date with the inputs now instead of installing the previous one
+        if self._preview_after_id:
+            self.root.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+        self._dirty = False
+        if not self.generate_preview():
+            return
+        
+        if not self._last_cfg:
+            self.show_apply_error("No configuration has been generated")
+            return
+        xorg_config = self._last_cfg["xorg"]
+        nvidia_config = self._last_cfg["nvidia"]
+        
+        # Ask up front so the restart runs in the same elevated session
+        restart = messagebox.askyesnocancel("Apply Configuration",
+                                           "Restart the display manager after applying?\n"
+                                           "(This will close all applications and log you out)",
+                                           icon='question')
+        if restart is None:
+            return
+        
+        # Writing the files and waiting on pkexec happens off the Tk thread;
+        # no second apply can start until this one has finished
+        self.apply_button.state(['disabled'])
+        self.status_var.set("Applying configuration...")
+        self.run_in_background(self.write_and_apply, xorg_config, nvidia_config, restart,
+                               self.rebuild_initramfs.get(), callback=self._apply_finished)
 
-# Check for mkinitcpio or dracut and update initramfs
-if command -v mkinitcpio >/dev/null 2>&1; then
-    mkinitcpio -P
-elif command -v dracut >/dev/null 2>&1; then
-    dracut --force
-elif command -v update-initramfs >/dev/null 2>&1; then
-    update-initramfs -u
-else
-    echo "Warning: Could not find mkinitcpio, dracut, or update-initramfs. Initramfs not updated."
-    # Still return success as the xorg config has been updated
-fi
-""")
-            os.chmod(script_path, 0o755)
-            
-            # Run helper script with sudo
-            success, message = run_with_sudo(['/bin/bash', script_path, tmp_dir])
-            
-            # Cleanup temporary files
-            try:
-                shutil.rmtree(tmp_dir)
-            except:
-                pass
+    def write_and_apply(self, xorg_config, nvidia_config, restart=False, rebuild_initramfs=False):
+        """Install the configuration files as root (runs on the worker pool)"""
+        # The files travel inside the script, as here-documents
+        script = (_APPLY_SCRIPT
+                  .replace('@XORG_CONFIG@', xorg_config)
+                  .replace('@NVIDIA_CONFIG@', nvidia_config)
+                  .replace('@INSTALLED_MARKER@', _INSTALLED_MARKER))
+        
+        # Restart the display manager from the script so that only one
+        # authentication is needed
+        args = []
+        if rebuild_initramfs:
+            args.append('initramfs')
+        if restart:
+            args.append('restart')
+        success, message = run_with_sudo(script, args, parent=self.root)
+        installed = _INSTALLED_MARKER in message
+        message = message.replace(_INSTALLED_MARKER + "\n", "")
+        if not success and not message:
+            message = "The apply script failed"
+        
+        # A helper can exit 0 without having run the script at all, so
+        # success means the files now hold what was generated
+        if success and not (_file_contains(_XORG_CONF, xorg_config) and
+                            _file_contains(_NVIDIA_CONF, nvidia_config)):
+            return False, False, "The configuration files were not installed"
+        return success, installed, message
+
+    def _apply_finished(self, future):
+        """Report the result of write_and_apply"""
+        self.apply_button.state(['!disabled'])
+        try:
+            success, installed, message = future.result()
             
             if success:
-                restart = messagebox.askquestion("Success",
-                                               "Configuration applied successfully.\n\n"
-                                               "Would you like to restart the display manager now?\n"
-                                               "(This will close all applications and log you out)",
-                                               icon='info')
-                if restart == 'yes':
-                    run_with_sudo(['systemctl', 'restart', 'display-manager'])
-                else:
-                    messagebox.showinfo("Success",
-                                      "Configuration saved. The changes will take effect\n"
-                                      "after you restart your display manager or reboot.")
+                self.invalidate_xrandr_cache()
+                self.status_var.set("Configuration applied.")
+                messagebox.showinfo(_SUCCESS_TITLE, _SUCCESS_BODY)
             else:
-                # Check if partial success (script ran but returned error)
-                if os.path.exists('/etc/X11/xorg.conf.d/10-custom-modes.conf'):
-                    # If the file exists, it means the main config was applied
-                    restart = messagebox.askquestion("Partial Success",
-                                                  f"Configuration partially applied but with warning:\n{message}\n\n"
-                                                  "The custom resolution may still work.\n"
-                                                  "Would you like to restart the display manager now?\n"
-                                                  "(This will close all applications and log you out)",
-                                                  icon='warning')
-                    if restart == 'yes':
-                        run_with_sudo(['systemctl', 'restart', 'display-manager'])
-                    else:
-                        messagebox.showinfo("Partial Success",
-                                          "Configuration saved with warnings. Changes will take effect after restart.")
+                # Partial success: this run installed both files, then a
+                # later step failed
+                if installed:
+                    messagebox.showwarning("Partial Success",
+                                         f"Configuration partially applied but with warning:\n{message}\n\n"
+                                         "The custom resolution may still work.\n"
+                                         "Changes will take effect after restart.")
                 raise Exception(message)
             
         except Exception as e:
-            messagebox.showerror("Error",
-                               f"Failed to apply configuration:\n{str(e)}\n\n"
-                               "Make sure you have administrator privileges and "
-                               "the required dependencies are installed.")
-            self.status_var.set("Error: Failed to apply configuration")
+            self.show_apply_error(e)
+
+    def show_apply_error(self, error):
+        messagebox.showerror("Error",
+                           f"Failed to apply configuration:\n{str(error)}\n\n"
+                           "Make sure you have administrator privileges and "
+                           "the required dependencies are installed.")
+        self.status_var.set("Error: Failed to apply configuration")
+
+def _configure_styles():
+    """Set up the ttk styles for the main window and the password prompt, once"""
+    style = ttk.Style()
+    style.configure('Header.TLabel', font=('TkDefaultFont', 12, 'bold'))
+    style.configure('Auth.TLabel', font=('TkDefaultFont', 10))
 
 def main():
     root = tk.Tk()
+    _configure_styles()
     app = LinuxCRU(root)
     root.mainloop()
 